@@ -0,0 +1,17 @@
+"""Optional numba shim.
+
+Import `njit` from here instead of from numba directly: when numba is
+installed the real JIT decorator is used, otherwise a transparent no-op
+takes its place and the engine runs as plain Python.
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]          # bare @njit
+
+        def wrap(func):
+            return func             # @njit(cache=True, ...)
+        return wrap
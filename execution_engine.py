@@ -1,10 +1,18 @@
+import asyncio
+import copy
+import pickle
 import time
+from collections import deque
 from datetime import datetime
-import pandas as pd
+from functools import lru_cache
 import numpy as np
 import sqlite3
 import logging
-from ib_insync import *
+import logging.handlers
+import queue
+from ib_insync import IB, Forex, LimitOrder, Order
+
+from _njit import njit
 
 # =============================================================================
 # ██╗  ██╗ ██████╗ ███╗   ██╗ █████╗ ██████╗  █████╗ ██╗   ██╗
@@ -45,25 +53,55 @@ TRAIL_TIERS = {
     'T3': {'JPY': 0.08, 'OTHER': 0.0008},   # EMA stack — tight crumb grab
 }
 
+# RSI guard rails per tier: longs blocked above the first value, shorts
+# blocked below the second — tighter tiers get less momentum headroom
+RSI_GUARDS = {
+    'T1': (70, 30),   # crossover
+    'T2': (65, 35),   # pullback bounce
+    'T3': (60, 40),   # EMA stack
+}
+
 # Pullback tolerance: how close price must get to fast EMA (in pips) for T2
 PULLBACK_TOLERANCE_PIPS = 1.5
 
+# Worst acceptable entry slippage beyond the signal price (pips). The entry
+# limit is priced this far through the signal and sent IOC: filled near the
+# signal within moments, or cancelled — never left resting at a stale price.
+MAX_SLIPPAGE_PIPS = 1.0
+
 # Bars to wait after any trade fires (cooldown per pair)
 COOLDOWN_BARS = 3
 
+# Minimum seconds between live ticker redraws (ticks arrive far faster)
+TICKER_REDRAW_SECS = 1.0
+
 # ---------------------------------------------------------------------------
 # 2. LOGGING
 # ---------------------------------------------------------------------------
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s  %(levelname)-8s  %(message)s',
-    datefmt='%H:%M:%S',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('konaray.log', encoding='utf-8'),
-    ]
+# All records go through a queue to a listener thread, so the event loop
+# only pays for an enqueue — stdout/file writes and flushes happen off the
+# trading path.
+_LOG_QUEUE  = queue.SimpleQueue()
+_LOG_FORMAT = logging.Formatter('%(asctime)s  %(levelname)-8s  %(message)s',
+                                datefmt='%H:%M:%S')
+
+_log_handlers = (
+    logging.StreamHandler(),
+    logging.FileHandler('konaray.log', encoding='utf-8'),
 )
+for _h in _log_handlers:
+    _h.setFormatter(_LOG_FORMAT)
+
+_log_listener = logging.handlers.QueueListener(_LOG_QUEUE, *_log_handlers)
+_log_listener.start()
+
+# The queue handler merges lazy %-args before enqueueing; give it a bare
+# message formatter so the listener's handlers apply the real layout once
+_queue_handler = logging.handlers.QueueHandler(_LOG_QUEUE)
+_queue_handler.setFormatter(logging.Formatter('%(message)s'))
+
+logging.basicConfig(level=logging.INFO, handlers=[_queue_handler])
 log = logging.getLogger('KONARAY')
 
 # ---------------------------------------------------------------------------
@@ -74,11 +112,20 @@ ib            = IB()
 LATEST_PRICES = {}                  # pair → latest mid price (live display)
 COOLDOWN      = {}                  # pair → bars remaining before next entry
 
+# One Contract per pair, built once and qualified once at startup —
+# everything downstream references these instead of rebuilding them
+CONTRACTS = {symbol: Forex(symbol) for symbol in SYMBOL_LIST}
+
+# Live keepUpToDate BarDataLists — tracked so a resubscribe cancels the
+# old streams instead of stacking duplicates
+_BAR_SUBSCRIPTIONS: list = []
+
 # ---------------------------------------------------------------------------
 # 4. DATABASE
 # ---------------------------------------------------------------------------
 
-DB_PATH = 'trading_log.db'
+DB_PATH    = 'trading_log.db'
+STATE_PATH = 'indicator_state.pkl'   # per-pair EWM accumulators, for restarts
 
 def setup_database() -> None:
     """Initialise the SQLite trade ledger (idempotent)."""
@@ -132,9 +179,11 @@ def log_exit(child_id: int, exit_price: float, pnl_pips: float) -> None:
 def _now() -> str:
     return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
+@lru_cache(maxsize=None)
 def _is_jpy(identifier: str) -> bool:
     return 'JPY' in identifier.upper()
 
+@lru_cache(maxsize=None)
 def _pip_multiplier(identifier: str) -> int:
     return 100 if _is_jpy(identifier) else 10_000
 
@@ -149,8 +198,8 @@ def _trail(tier: str, pair: str) -> float:
 # 6. SAFETY CHECKS
 # ---------------------------------------------------------------------------
 
-def has_pending_order(contract) -> bool:
-    for trade in ib.openTrades():
+def has_pending_order(contract, open_trades) -> bool:
+    for trade in open_trades:
         c = trade.contract
         if (c.symbol == contract.symbol
                 and c.currency == contract.currency
@@ -159,8 +208,8 @@ def has_pending_order(contract) -> bool:
     return False
 
 
-def get_open_position(contract) -> float:
-    for p in ib.positions():
+def get_open_position(contract, positions) -> float:
+    for p in positions:
         if (p.contract.symbol == contract.symbol
                 and p.contract.currency == contract.currency):
             return p.position
@@ -185,10 +234,10 @@ def _check_spread(contract) -> bool:
     return True
 
 
-def _check_trend_slope(trend_series: pd.Series, pair: str) -> bool:
-    if len(trend_series) < 5:
+def _check_trend_slope(trend_hist: list[float], pair: str) -> bool:
+    if len(trend_hist) < TREND_SLOPE_BARS:
         return True
-    slope = abs(trend_series.iloc[-1] - trend_series.iloc[-5]) * _pip_multiplier(pair)
+    slope = abs(trend_hist[-1] - trend_hist[-TREND_SLOPE_BARS]) * _pip_multiplier(pair)
     if slope < MIN_TREND_SLOPE:
         log.info("🛑 Flat market %s | slope %.3f pips", pair, slope)
         return False
@@ -199,33 +248,198 @@ def _check_trend_slope(trend_series: pd.Series, pair: str) -> bool:
 # 7. INDICATORS
 # ---------------------------------------------------------------------------
 
-def calculate_indicators(df: pd.DataFrame) -> dict:
+RSI_SPAN = 14
+
+# EWM step factors, derived once from the spans instead of per call
+_ALPHA_FAST  = 2.0 / (EMA_FAST + 1)
+_ALPHA_SLOW  = 2.0 / (EMA_SLOW + 1)
+_ALPHA_TREND = 2.0 / (EMA_TREND + 1)
+_ALPHA_RSI   = 2.0 / (RSI_SPAN + 1)
+
+# Pullback zone in price units for both pip regimes
+_PULLBACK_ZONE_JPY   = PULLBACK_TOLERANCE_PIPS / 100
+_PULLBACK_ZONE_OTHER = PULLBACK_TOLERANCE_PIPS / 10_000
+
+# Bars of trend-EMA history the slope filter looks back over
+TREND_SLOPE_BARS = 5
+
+# Cap on retained bar history per subscription. Indicator state is carried
+# incrementally, so old Bar objects only cost memory (~56 bytes of object
+# header each vs 8 for a raw float); keep enough to reseed cleanly after a
+# stream gap and trim the rest.
+MAX_BARS_KEPT = EMA_TREND * 3
+
+# Warm-up depth for the initial history request, in bars. 3x the slowest
+# EMA span leaves the seed value with ~0.2% weight ((1-alpha)^600) — deep
+# enough that seeded EMAs match a much longer history to well under a pip,
+# at a fraction of the payload of the old full-day fetch.
+WARMUP_BARS = MAX_BARS_KEPT
+
+# Incremental indicator state per pair. Seeded once from the warm-up
+# history, then advanced one EWM step per closed bar — ewm(adjust=False)
+# is a pure recurrence, so the stepped values match a full recomputation.
+_IND_STATE: dict[str, dict] = {}
+
+
+def _ewm_step(prev: float, value: float, alpha: float) -> float:
+    return prev + alpha * (value - prev)
+
+
+@njit(cache=True, fastmath=True)
+def _ewm_last(values: np.ndarray, span: int) -> float:
+    """Final value of an EWM over `values` (adjust=False recurrence)."""
+    alpha = 2.0 / (span + 1)
+    acc = values[0]
+    for i in range(1, values.size):
+        acc += alpha * (values[i] - acc)
+    return float(acc)
+
+
+@njit(cache=True, fastmath=True)
+def _ewm_array(values: np.ndarray, span: int) -> np.ndarray:
+    """Full EWM series over `values` (adjust=False recurrence)."""
+    alpha = 2.0 / (span + 1)
+    out = np.empty_like(values)
+    acc = values[0]
+    out[0] = acc
+    for i in range(1, values.size):
+        acc += alpha * (values[i] - acc)
+        out[i] = acc
+    return out
+
+
+def _seed_indicator_state(bars) -> dict:
+    """Run the full-history computation once per pair and capture the EWM
+    accumulators over all finalized bars (everything except the
+    still-forming last one)."""
+    closes = np.fromiter((b.close for b in bars), dtype=np.float64,
+                         count=len(bars))[:-1]
+
+    trend = _ewm_array(closes, EMA_TREND)
+
+    # Branchless split of delta into gain/loss: 0.5*(d+|d|) / 0.5*(|d|-d)
+    delta = np.diff(closes)
+    adelta = np.abs(delta)
+    gain  = 0.5 * (delta + adelta)
+    loss  = 0.5 * (adelta - delta)
+
+    return {
+        'last_bar':   bars[-1].date,
+        'close':      float(closes[-1]),
+        'fast':       _ewm_last(closes, EMA_FAST),
+        'slow':       _ewm_last(closes, EMA_SLOW),
+        'trend':      float(trend[-1]),
+        'gain_ewm':   _ewm_last(gain, RSI_SPAN),
+        'loss_ewm':   _ewm_last(loss, RSI_SPAN),
+        'trend_hist': deque(trend[-(TREND_SLOPE_BARS - 1):],
+                            maxlen=TREND_SLOPE_BARS - 1),
+    }
+
+
+def _load_indicator_state() -> None:
+    """Restore per-pair accumulators from the previous run (if any)."""
+    try:
+        with open(STATE_PATH, 'rb') as f:
+            _IND_STATE.update(pickle.load(f))
+        log.info("♻️  Indicator state restored for %s", ', '.join(_IND_STATE))
+    except FileNotFoundError:
+        pass
+    except Exception as exc:
+        log.warning("⚠️  Could not restore indicator state: %s", exc)
+
+
+def _save_indicator_state() -> None:
+    try:
+        with open(STATE_PATH, 'wb') as f:
+            pickle.dump(_IND_STATE, f)
+    except OSError as exc:
+        log.warning("⚠️  Could not persist indicator state: %s", exc)
+
+
+def _commit_bar(st: dict, close: float) -> None:
+    """Fold one finalized bar into the per-pair EWM accumulators."""
+    delta  = close - st['close']
+    adelta = abs(delta)
+    st['fast']     = _ewm_step(st['fast'],  close, _ALPHA_FAST)
+    st['slow']     = _ewm_step(st['slow'],  close, _ALPHA_SLOW)
+    st['trend']    = _ewm_step(st['trend'], close, _ALPHA_TREND)
+    st['gain_ewm'] = _ewm_step(st['gain_ewm'], 0.5 * (delta + adelta), _ALPHA_RSI)
+    st['loss_ewm'] = _ewm_step(st['loss_ewm'], 0.5 * (adelta - delta), _ALPHA_RSI)
+    st['trend_hist'].append(st['trend'])
+    st['close'] = close
+
+
+def _replay_missed_bars(st: dict, bars) -> bool:
+    """Advance saved state through bars that closed while the engine was
+    away. Returns False when the gap predates the fetched history, in which
+    case the caller reseeds from scratch."""
+    dates = [b.date for b in bars]
+    try:
+        i = dates.index(st['last_bar'])
+    except ValueError:
+        return False
+
+    # bars[i] was still forming when the state was saved; its close is
+    # final now, as is everything up to the current forming bar
+    for b in bars[i:-1]:
+        _commit_bar(st, b.close)
+    st['last_bar'] = bars[-1].date
+    return True
+
+
+def calculate_indicators(bars, pair: str) -> dict:
     """
-    Computes EMAs and RSI. Returns a dict of named values for clean access.
-    All series are computed over the full dataframe; callers read iloc[-1] etc.
+    Computes EMAs and RSI for the newest bar. Returns a dict of named values.
+
+    Operates on the BarDataList directly — no DataFrame materialization;
+    only the close prices are ever read. First call per pair seeds the
+    accumulators from the full history; each later bar commits the previous
+    bar's final close in O(1). The still-forming last bar is folded in
+    provisionally and never committed, exactly as a full recomputation over
+    the history would see it.
     """
-    close = df['close']
+    bar_date = bars[-1].date
+    price    = bars[-1].close
+
+    st = _IND_STATE.get(pair)
+    if st is None:
+        st = _IND_STATE[pair] = _seed_indicator_state(bars)
+    elif bar_date == st['last_bar']:
+        pass                                    # same bar re-delivered
+    elif bars[-2].date == st['last_bar']:
+        _commit_bar(st, bars[-2].close)         # previous bar just closed
+        st['last_bar'] = bar_date
+    else:
+        # Gap in the stream (restart / reconnect) — replay the missed bars
+        # through the accumulators, or reseed if they have aged out
+        if not _replay_missed_bars(st, bars):
+            st = _IND_STATE[pair] = _seed_indicator_state(bars)
 
-    fast  = close.ewm(span=EMA_FAST,  adjust=False).mean()
-    slow  = close.ewm(span=EMA_SLOW,  adjust=False).mean()
-    trend = close.ewm(span=EMA_TREND, adjust=False).mean()
+    fast_prev = st['fast']
+    slow_prev = st['slow']
+    fast_now  = _ewm_step(fast_prev,   price, _ALPHA_FAST)
+    slow_now  = _ewm_step(slow_prev,   price, _ALPHA_SLOW)
+    trend_now = _ewm_step(st['trend'], price, _ALPHA_TREND)
 
     # RSI-14 — used to avoid entries into overbought/oversold extremes
-    delta   = close.diff()
-    gain    = delta.clip(lower=0).ewm(span=14, adjust=False).mean()
-    loss    = (-delta.clip(upper=0)).ewm(span=14, adjust=False).mean()
-    rs      = gain / loss.replace(0, np.nan)
-    rsi     = 100 - (100 / (1 + rs))
+    delta  = price - st['close']
+    adelta = abs(delta)
+    gain   = _ewm_step(st['gain_ewm'], 0.5 * (delta + adelta), _ALPHA_RSI)
+    loss   = _ewm_step(st['loss_ewm'], 0.5 * (adelta - delta), _ALPHA_RSI)
+    # loss == 0 means an unbroken rising streak: RSI is 100 by definition
+    # (TA-Lib convention). Returning NaN here would make every RSI guard
+    # comparison False and silently mute the pair until it ticked down.
+    rsi   = 100 - (100 / (1 + gain / loss)) if loss > 0 else 100.0
 
     return {
-        'fast_now':  fast.iloc[-1],
-        'fast_prev': fast.iloc[-2],
-        'slow_now':  slow.iloc[-1],
-        'slow_prev': slow.iloc[-2],
-        'trend_now': trend.iloc[-1],
-        'trend_s':   trend,              # full series for slope check
-        'rsi':       rsi.iloc[-1],
-        'price':     close.iloc[-1],
+        'fast_now':  fast_now,
+        'fast_prev': fast_prev,
+        'slow_now':  slow_now,
+        'slow_prev': slow_prev,
+        'trend_now': trend_now,
+        'trend_s':   list(st['trend_hist']) + [trend_now],   # for slope check
+        'rsi':       rsi,
+        'price':     price,
     }
 
 # ---------------------------------------------------------------------------
@@ -251,35 +465,38 @@ def evaluate_signal(ind: dict, pair: str) -> tuple[str | None, str | None]:
     trend_now  = ind['trend_now']
     price      = ind['price']
     rsi        = ind['rsi']
-    mult       = _pip_multiplier(pair)
+
+    t1_hi, t1_lo = RSI_GUARDS['T1']
+    t2_hi, t2_lo = RSI_GUARDS['T2']
+    t3_hi, t3_lo = RSI_GUARDS['T3']
 
     # ── Tier 1: Crossover ──────────────────────────────────────────────────
     crossed_up   = fast_prev <= slow_prev and fast_now > slow_now
     crossed_down = fast_prev >= slow_prev and fast_now < slow_now
 
-    if crossed_up and price > trend_now and rsi < 70:
+    if crossed_up and price > trend_now and rsi < t1_hi:
         return 'BUY', 'T1'
-    if crossed_down and price < trend_now and rsi > 30:
+    if crossed_down and price < trend_now and rsi > t1_lo:
         return 'SELL', 'T1'
 
     # ── Tier 2: Pullback bounce ────────────────────────────────────────────
     # Uptrend established: fast > slow > trend. Price dips near fast EMA then
     # closes back above it. A classic "kiss and go" crumb.
-    pullback_zone = PULLBACK_TOLERANCE_PIPS / mult
+    pullback_zone = _PULLBACK_ZONE_JPY if _is_jpy(pair) else _PULLBACK_ZONE_OTHER
 
     in_uptrend   = fast_now > slow_now > trend_now
     in_downtrend = fast_now < slow_now < trend_now
 
     # For a BUY bounce: previous bar touched near or below fast EMA, current
     # bar closes above it — and RSI has room to run (not overbought)
-    if in_uptrend and rsi < 65:
+    if in_uptrend and rsi < t2_hi:
         prev_close = ind.get('prev_price', price)   # fallback safe
         near_fast  = abs(prev_close - fast_prev) <= pullback_zone
         reclaimed  = price > fast_now
         if near_fast and reclaimed:
             return 'BUY', 'T2'
 
-    if in_downtrend and rsi > 35:
+    if in_downtrend and rsi > t2_lo:
         prev_close = ind.get('prev_price', price)
         near_fast  = abs(prev_close - fast_prev) <= pullback_zone
         reclaimed  = price < fast_now
@@ -292,9 +509,9 @@ def evaluate_signal(ind: dict, pair: str) -> tuple[str | None, str | None]:
     fast_sloping_up   = fast_now > fast_prev
     fast_sloping_down = fast_now < fast_prev
 
-    if in_uptrend and fast_sloping_up and price > fast_now and rsi < 60:
+    if in_uptrend and fast_sloping_up and price > fast_now and rsi < t3_hi:
         return 'BUY', 'T3'
-    if in_downtrend and fast_sloping_down and price < fast_now and rsi > 40:
+    if in_downtrend and fast_sloping_down and price < fast_now and rsi > t3_lo:
         return 'SELL', 'T3'
 
     return None, None
@@ -303,38 +520,49 @@ def evaluate_signal(ind: dict, pair: str) -> tuple[str | None, str | None]:
 # 9. ORDER EXECUTION
 # ---------------------------------------------------------------------------
 
+# Order templates — the ~40-field Order init runs once here instead of
+# twice per signal; place_trade shallow-copies and fills per-trade fields
+_PARENT_TEMPLATE = LimitOrder('', FIXED_ORDER_SIZE, 0.0,
+                              tif='IOC', transmit=False)
+_TRAIL_TEMPLATE  = Order(orderType='TRAIL', totalQuantity=FIXED_ORDER_SIZE,
+                         tif='GTC', transmit=True)
+
+
 def place_trade(contract, direction: str, tier: str, price: float,
                 ema_fast: float, ema_slow: float) -> None:
     pair       = _pair(contract)
     trail_dist = _trail(tier, pair)
     exit_side  = 'SELL' if direction == 'BUY' else 'BUY'
 
-    parent          = LimitOrder(direction, FIXED_ORDER_SIZE, price)
+    # Marketable limit: cross the signal price by the slippage budget so the
+    # IOC entry fills immediately in normal conditions but can never fill
+    # worse than MAX_SLIPPAGE_PIPS away
+    slip     = MAX_SLIPPAGE_PIPS / _pip_multiplier(pair)
+    decimals = 3 if _is_jpy(pair) else 5
+    limit    = round(price + slip if direction == 'BUY' else price - slip,
+                     decimals)
+
+    parent          = copy.copy(_PARENT_TEMPLATE)
+    parent.action   = direction
+    parent.lmtPrice = limit
     parent.orderId  = ib.client.getReqId()
-    parent.tif      = 'GTC'
-    parent.transmit = False
-
-    trail = Order(
-        action        = exit_side,
-        orderType     = 'TRAIL',
-        totalQuantity = FIXED_ORDER_SIZE,
-        auxPrice      = trail_dist,
-        parentId      = parent.orderId,
-        tif           = 'GTC',
-        transmit      = True,
-    )
-    trail.orderId = ib.client.getReqId()
+
+    trail          = copy.copy(_TRAIL_TEMPLATE)
+    trail.action   = exit_side
+    trail.auxPrice = trail_dist
+    trail.parentId = parent.orderId
+    trail.orderId  = ib.client.getReqId()
 
     ib.placeOrder(contract, parent)
     ib.placeOrder(contract, trail)
 
     log_entry(parent.orderId, trail.orderId, pair, direction,
-              tier, price, ema_fast, ema_slow)
+              tier, limit, ema_fast, ema_slow)
 
     COOLDOWN[pair] = COOLDOWN_BARS
 
     log.info("🚀 [%s] %s %s | Entry: %.5f | Trail: %.5f",
-             tier, direction, pair, price, trail_dist)
+             tier, direction, pair, limit, trail_dist)
 
 # ---------------------------------------------------------------------------
 # 10. BAR CALLBACK
@@ -343,21 +571,35 @@ def place_trade(contract, direction: str, tier: str, price: float,
 # Store previous close per pair for T2 pullback detection
 _PREV_CLOSE: dict[str, float] = {}
 
+# Monotonic timestamp of the last ticker redraw
+_last_ticker_draw = 0.0
+
 def on_bar_update(bars, hasNewBar: bool) -> None:
+    global _last_ticker_draw
+
     contract = bars.contract
     pair     = _pair(contract)
-    df       = util.df(bars)
-    price    = df.iloc[-1]['close']
+    price    = bars[-1].close
 
-    # Live tick display
+    # Live tick display — ticks arrive many times per second per pair, so
+    # only pay for string formatting at the redraw interval
     if not hasNewBar:
         LATEST_PRICES[pair] = price
-        ticker_str = ' | '.join(f"{k}: {v:.5f}" for k, v in LATEST_PRICES.items())
-        print(f"   📡 {ticker_str}" + ' ' * 12, end='\r')
+        now = time.monotonic()
+        if now - _last_ticker_draw >= TICKER_REDRAW_SECS:
+            _last_ticker_draw = now
+            ticker_str = ' | '.join(f"{k}: {v:.5f}" for k, v in LATEST_PRICES.items())
+            print(f"   📡 {ticker_str}" + ' ' * 12, end='\r')
         return
 
     # ── New bar closed ──
-    ind = calculate_indicators(df)
+    ind = calculate_indicators(bars, pair)
+    _save_indicator_state()
+
+    # Trim aged-off bars in batches; a 24/7 stream would otherwise grow the
+    # list by ~1440 Bar objects per pair per day for no consumer
+    if len(bars) > MAX_BARS_KEPT + 60:
+        del bars[:len(bars) - MAX_BARS_KEPT]
     # Inject previous close for T2 pullback check
     ind['prev_price'] = _PREV_CLOSE.get(pair, ind['price'])
     _PREV_CLOSE[pair] = price
@@ -372,25 +614,33 @@ def on_bar_update(bars, hasNewBar: bool) -> None:
         log.info("   ⏸  Cooldown %s — %d bars remaining", pair, COOLDOWN[pair])
         return
 
-    # ── Hard guards (unchanged) ──
-    if has_pending_order(contract):
+    # ── Signal first ──
+    # Signal evaluation is pure O(1) arithmetic, so run it before touching
+    # any broker state; most bars carry no signal and stop right here.
+    direction, tier = evaluate_signal(ind, pair)
+
+    if not (direction and tier):
+        log.debug("   No signal on %s this bar", pair)
         return
-    if get_open_position(contract) != 0:
+
+    # ── Hard guards — consulted only when a signal wants to fire ──
+    # Snapshot broker state once per bar and hand it to the guards, rather
+    # than letting each guard pull its own copy.
+    open_trades = ib.openTrades()
+    positions   = ib.positions()
+
+    if has_pending_order(contract, open_trades):
+        return
+    if get_open_position(contract, positions) != 0:
         return
     if not _check_spread(contract):
         return
     if not _check_trend_slope(ind['trend_s'], pair):
         return
 
-    # ── Signal ──
-    direction, tier = evaluate_signal(ind, pair)
-
-    if direction and tier:
-        log.info("✅ [%s] %s signal on %s", tier, direction, pair)
-        place_trade(contract, direction, tier, price,
-                    ind['fast_now'], ind['slow_now'])
-    else:
-        log.debug("   No signal on %s this bar", pair)
+    log.info("✅ [%s] %s signal on %s", tier, direction, pair)
+    place_trade(contract, direction, tier, price,
+                ind['fast_now'], ind['slow_now'])
 
 # ---------------------------------------------------------------------------
 # 11. FILL CALLBACK
@@ -421,38 +671,147 @@ def on_fill(trade, fill) -> None:
              tier, symbol, pnl_pips, fill_price)
 
 # ---------------------------------------------------------------------------
-# 12. ENTRY POINT
+# 12. CONNECTION WATCHDOG
 # ---------------------------------------------------------------------------
 
-if __name__ == '__main__':
-    setup_database()
+RECONNECT_MAX_BACKOFF = 30          # seconds between attempts, capped
 
-    ib.connect(TWS_HOST, TWS_PORT, clientId=CLIENT_ID)
-    log.info("✅ Connected — Konaray v14.0 Crumb Hunter")
-    log.info("   Tiers active: T1 (crossover) | T2 (pullback) | T3 (stack)")
-    log.info("   Spread cap: %.1f pips | Slope min: %.2f pips | Cooldown: %d bars",
-             MAX_SPREAD_PIPS, MIN_TREND_SLOPE, COOLDOWN_BARS)
+# Seconds of total socket silence before the session is declared hung.
+# Ticks arrive many times a minute, so this only trips on a real stall.
+IDLE_TIMEOUT = 90
+
+_reconnect_attempts = 0
+
+
+def on_timeout(idle: float) -> None:
+    """A hung TWS can stop sending data while keeping the socket open —
+    that never fires disconnectedEvent or an error code. ib.setTimeout
+    raises this event instead; force a disconnect so the reconnect
+    watchdog takes over."""
+    log.warning("🔌 No data for %.0fs — session looks hung, forcing reconnect",
+                idle)
+    ib.disconnect()
+
+
+def on_disconnect() -> None:
+    """Kick off background reconnection instead of letting the engine sit
+    on a dead socket losing bars."""
+    asyncio.ensure_future(_reconnect())
+
+
+async def _reconnect() -> None:
+    global _reconnect_attempts
+    while not ib.isConnected():
+        delay = min(2 ** _reconnect_attempts, RECONNECT_MAX_BACKOFF)
+        _reconnect_attempts += 1
+        log.warning("🔌 Disconnected — reconnecting in %ds (attempt %d)",
+                    delay, _reconnect_attempts)
+        await asyncio.sleep(delay)
+        try:
+            await ib.connectAsync(TWS_HOST, TWS_PORT,
+                                  clientId=CLIENT_ID, timeout=5)
+        except Exception as exc:
+            log.warning("   Reconnect failed: %s", exc)
+            continue
+
+    _reconnect_attempts = 0
+    ib.setTimeout(IDLE_TIMEOUT)
+    log.info("✅ Reconnected — resubscribing")
+    await load_history()    # missed bars are replayed into indicator state
+
+
+def on_ib_error(reqId, errorCode, errorString, contract) -> None:
+    # 1100/1101/1102: TWS ↔ IB farm connectivity lost/restored
+    if errorCode in (1100, 1101, 1102):
+        log.warning("🔌 Connectivity event %d: %s", errorCode, errorString)
+    if errorCode == 1101:
+        # Restored but subscriptions dropped server-side — resubscribe
+        asyncio.ensure_future(load_history())
 
-    ib.execDetailsEvent += on_fill
+# ---------------------------------------------------------------------------
+# 13. ENTRY POINT
+# ---------------------------------------------------------------------------
+
+async def load_history() -> None:
+    """Qualify all pairs and fetch their warm-up history concurrently.
 
-    for symbol in SYMBOL_LIST:
-        contract = Forex(symbol)
-        ib.qualifyContracts(contract)
+    Historical requests are network-bound, so issuing them together and
+    gathering the results overlaps the round-trips: total load time is one
+    request's latency, not one per pair.
+
+    This is the only historical request the engine ever makes per pair:
+    keepUpToDate=True streams each new bar over the same subscription, so
+    steady state transfers one bar per minute per pair and never re-issues
+    a request (no exposure to IBKR's identical-request pacing rule).
+    """
+    contracts = list(CONTRACTS.values())
+
+    # Tear down any live subscriptions first so a resubscribe (reconnect or
+    # error 1101) can never double-deliver bars into on_bar_update or leak
+    # orphaned BarDataLists
+    if _BAR_SUBSCRIPTIONS:
+        log.info("♻️  Cancelling %d live bar subscriptions before resubscribing",
+                 len(_BAR_SUBSCRIPTIONS))
+        for bars in _BAR_SUBSCRIPTIONS:
+            bars.updateEvent -= on_bar_update
+            ib.cancelHistoricalData(bars)
+        _BAR_SUBSCRIPTIONS.clear()
+        for contract in contracts:
+            ib.cancelMktData(contract)
+
+    # Qualification is static per contract — only hit the server once
+    if not all(c.conId for c in contracts):
+        await ib.qualifyContractsAsync(*contracts)
+
+    for contract in contracts:
         ib.reqMktData(contract, '', False, False)
 
-        log.info("⏳ Loading history for %s …", symbol)
-        bars = ib.reqHistoricalData(
+    log.info("⏳ Loading history for %s …", ', '.join(SYMBOL_LIST))
+    tasks = [
+        ib.reqHistoricalDataAsync(
             contract,
             endDateTime    = '',
-            durationStr    = '1 D',
+            durationStr    = f'{WARMUP_BARS * 60} S',
             barSizeSetting = TIMEFRAME,
             whatToShow     = 'MIDPOINT',
             useRTH         = False,
             keepUpToDate   = True,
             timeout        = 60,
         )
+        for contract in contracts
+    ]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+
+    for contract, bars in zip(contracts, results):
+        if isinstance(bars, Exception):
+            log.error("❌ History load failed for %s: %s", _pair(contract), bars)
+            continue
         bars.updateEvent += on_bar_update
-        ib.sleep(2)
+        _BAR_SUBSCRIPTIONS.append(bars)
+
+
+async def main() -> None:
+    """Async startup: connect, wire callbacks, warm up — then return and let
+    the event loop drive everything through bar/fill callbacks."""
+    await ib.connectAsync(TWS_HOST, TWS_PORT, clientId=CLIENT_ID, timeout=5)
+    log.info("✅ Connected — Konaray v14.0 Crumb Hunter")
+    log.info("   Tiers active: T1 (crossover) | T2 (pullback) | T3 (stack)")
+    log.info("   Spread cap: %.1f pips | Slope min: %.2f pips | Cooldown: %d bars",
+             MAX_SPREAD_PIPS, MIN_TREND_SLOPE, COOLDOWN_BARS)
+
+    ib.execDetailsEvent    += on_fill
+    ib.disconnectedEvent   += on_disconnect
+    ib.errorEvent          += on_ib_error
+    ib.timeoutEvent        += on_timeout
+    ib.setTimeout(IDLE_TIMEOUT)
+
+    _load_indicator_state()
+    await load_history()
 
     log.info("🟢 Engine live — hunting crumbs on %s", ', '.join(SYMBOL_LIST))
-    ib.run()
+
+
+if __name__ == '__main__':
+    setup_database()
+    ib.run(main())      # async startup
+    ib.run()            # event loop — callbacks take it from here